@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+🔧 預先編譯 (AOT) indicators.py 的 Numba 核心
+產生 market_kernels 擴充模組 (.so)，indicators 匯入時會優先使用，避免 CLI 每次啟動的 JIT 編譯延遲
+模組內嵌 indicators.py 的雜湊，原始碼變更後舊的編譯結果會自動被忽略
+"""
+
+import os
+
+from numba.pycc import CC
+
+from indicators import AOT_SIGNATURES, JIT_KERNELS, kernel_source_hash
+
+def build():
+    cc = CC('market_kernels')
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+    
+    for name, signature in AOT_SIGNATURES.items():
+        cc.export(name, signature)(JIT_KERNELS[name].py_func)
+    
+    # 供 indicators 匯入時比對原始碼版本
+    source_hash = kernel_source_hash()
+    def _source_hash():
+        return source_hash
+    cc.export('source_hash', 'i8()')(_source_hash)
+    
+    cc.compile()
+    print(f"✅ 已編譯: {os.path.join(cc.output_dir, cc.output_file)}")
+
+if __name__ == "__main__":
+    build()
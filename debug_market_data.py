@@ -4,115 +4,145 @@
 根據市場趨勢週期自動計算最佳持倉時間和獲利目標
 """
 
-import requests
-import json
+import asyncio
+import httpx
+import os
+import time
+import numpy as np
+import orjson
+from filelock import FileLock
+from scipy.signal import lfilter
 from datetime import datetime
 from pathlib import Path
 
+from indicators import LONG, calculate_rsi, segment_trends
+from klines import klines_to_arrays
+
 # Configuration
 TESTNET_BASE_URL = "https://testnet.binancefuture.com"
 SYMBOL = "BTCUSDT"
+KLINE_CACHE_DIR = Path("cache/klines")
+# K 線磁碟快取僅供開發迭代使用，需設定 KLINE_CACHE=1 才啟用
+KLINE_CACHE_ENABLED = os.environ.get("KLINE_CACHE") == "1"
+
+# 時間單位 (分鐘)
+INTERVAL_MINUTES = {'1m': 1, '5m': 5, '15m': 15, '30m': 30, '1h': 60}
 
-def get_json(url, params=None):
+async def get_json(client, url, params=None):
     try:
-        resp = requests.get(url, params=params, timeout=10)
+        resp = await client.get(url, params=params)
         if resp.status_code == 200:
             return resp.json()
     except Exception as e:
         print(f"⚠️ Exception fetching {url}: {e}")
     return None
 
+def _kline_cache_path(interval, limit):
+    return KLINE_CACHE_DIR / f"{SYMBOL}_{interval}_{limit}.json"
+
+def load_cached_klines(interval, limit):
+    """讀取快取的 K 線；只有在同一根 K 線週期內抓取的資料才視為有效"""
+    path = _kline_cache_path(interval, limit)
+    if not path.exists():
+        return None
+    
+    interval_sec = INTERVAL_MINUTES.get(interval, 1) * 60
+    try:
+        with FileLock(f"{path}.lock"):
+            with open(path, 'rb') as f:
+                cached = orjson.loads(f.read())
+        fetched_bucket = int(cached['fetched_at'] // interval_sec)
+        klines = cached['klines']
+    except (OSError, orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        # 檔案損壞或格式不符：視為快取失效，重新抓取
+        return None
+    
+    if not isinstance(klines, list) or not klines:
+        return None
+    if fetched_bucket != int(time.time() // interval_sec):
+        return None
+    return klines
+
+def save_cached_klines(interval, limit, klines):
+    path = _kline_cache_path(interval, limit)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with FileLock(f"{path}.lock"):
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps({'fetched_at': time.time(), 'klines': klines}))
+
+async def fetch_klines(client, interval, limit, use_cache=True):
+    use_cache = use_cache and KLINE_CACHE_ENABLED
+    if use_cache:
+        klines = load_cached_klines(interval, limit)
+        if klines is not None:
+            return klines
+    
+    klines = await get_json(client, f"{TESTNET_BASE_URL}/fapi/v1/klines", {"symbol": SYMBOL, "interval": interval, "limit": limit})
+    if klines and use_cache:
+        save_cached_klines(interval, limit, klines)
+    return klines
+
+async def fetch_all(client):
+    """並行抓取所有分析所需的 K 線 (1m / 5m / 30m 趨勢 + 最近6小時 5m 市場狀態)"""
+    return await asyncio.gather(
+        fetch_klines(client, "1m", 1000),
+        fetch_klines(client, "5m", 500),
+        fetch_klines(client, "30m", 200),
+        fetch_klines(client, "5m", 72, use_cache=False),  # 72個5分鐘K線 (寫入配置的即時狀態，不走快取)
+    )
+
 def calculate_ema(closes, period=20):
-    if len(closes) < period:
-        return []
+    """EMA，回傳 (ema_values, start_idx)：ema_values[j] 對應 closes[start_idx + j]，遞迴部分交給 lfilter 在 C 層計算"""
+    c = np.asarray(closes, dtype=np.float64)
+    start_idx = period - 1
+    if len(c) < period:
+        return np.empty(0, dtype=np.float64), start_idx
     
     alpha = 2 / (period + 1)
-    ema = [sum(closes[:period]) / period]
+    seed = c[:period].mean()
     
-    for i in range(period, len(closes)):
-        val = (closes[i] * alpha) + (ema[-1] * (1 - alpha))
-        ema.append(val)
-        
-    return [None] * (period - 1) + ema
+    # y[i] = alpha * x[i] + (1 - alpha) * y[i-1]，初始狀態帶入種子值
+    ema = np.empty(len(c) - start_idx)
+    ema[0] = seed
+    ema[1:], _ = lfilter([alpha], [1.0, alpha - 1.0], c[period:], zi=[seed * (1 - alpha)])
+    
+    return ema, start_idx
 
-def analyze_trend_stats(interval: str, limit: int = 500, verbose: bool = True):
-    """分析特定時間框架的趨勢統計"""
-    klines = get_json(f"{TESTNET_BASE_URL}/fapi/v1/klines", {"symbol": SYMBOL, "interval": interval, "limit": limit})
+def calc_stats(durations, moves):
+    """單一趨勢方向的統計 (次數 / 平均持續根數 / 平均、最大、75 百分位幅度)"""
+    n = len(moves)
+    if n == 0: return {'count': 0, 'avg_duration': 0, 'avg_move': 0, 'max_move': 0, 'p75_move': 0}
+    
+    # 一次 partition 同時取得 75 百分位與最大值
+    p75_idx = int(n * 0.75)
+    selected = np.partition(moves, (p75_idx, n - 1))
+    
+    return {
+        'count': n,
+        'avg_duration': float(durations.sum() / n),
+        'avg_move': float(moves.sum() / n),
+        'max_move': float(selected[n - 1]),
+        'p75_move': float(selected[p75_idx])  # 75 percentile
+    }
+
+def analyze_trend_stats(interval: str, klines, verbose: bool = True):
+    """分析特定時間框架的趨勢統計 (klines 為已抓取的 K 線)"""
     if not klines or len(klines) < 50:
         return None
 
-    closes = [float(k[4]) for k in klines]
-    highs = [float(k[2]) for k in klines]
-    lows = [float(k[3]) for k in klines]
-    
-    ema20 = calculate_ema(closes, 20)
+    _, highs, lows, closes = klines_to_arrays(klines)
     
-    trends = []
-    current_trend = None
+    ema20, ema_start = calculate_ema(closes, 20)
     
-    for i in range(20, len(closes)):
-        price = closes[i]
-        ema = ema20[i]
-        if ema is None: continue
-        
-        trend_type = "LONG" if price > ema else "SHORT"
-        
-        if current_trend is None:
-            current_trend = {
-                'type': trend_type,
-                'start_idx': i,
-                'start_price': price,
-                'high_price': price,
-                'low_price': price
-            }
-        elif current_trend['type'] != trend_type:
-            current_trend['end_idx'] = i - 1
-            current_trend['end_price'] = closes[i-1]
-            current_trend['max_move'] = (current_trend['high_price'] - current_trend['start_price']) / current_trend['start_price'] * 100 if current_trend['type'] == 'LONG' else (current_trend['start_price'] - current_trend['low_price']) / current_trend['start_price'] * 100
-            trends.append(current_trend)
-            
-            current_trend = {
-                'type': trend_type,
-                'start_idx': i,
-                'start_price': price,
-                'high_price': price,
-                'low_price': price
-            }
-        else:
-            current_trend['high_price'] = max(current_trend['high_price'], price)
-            current_trend['low_price'] = min(current_trend['low_price'], price)
-
-    if current_trend:
-        current_trend['end_idx'] = len(closes) - 1
-        current_trend['end_price'] = closes[-1]
-        current_trend['max_move'] = (current_trend['high_price'] - current_trend['start_price']) / current_trend['start_price'] * 100 if current_trend['type'] == 'LONG' else (current_trend['start_price'] - current_trend['low_price']) / current_trend['start_price'] * 100
-        trends.append(current_trend)
+    starts, ends, types, moves = segment_trends(closes, ema20, ema_start)
+    durations = ends - starts + 1
         
     # 計算統計
-    longs = [t for t in trends if t['type'] == 'LONG']
-    shorts = [t for t in trends if t['type'] == 'SHORT']
-    
-    def calc_stats(trend_list):
-        if not trend_list: return {'count': 0, 'avg_duration': 0, 'avg_move': 0, 'max_move': 0, 'p75_move': 0}
-        durations = [t['end_idx'] - t['start_idx'] + 1 for t in trend_list]
-        moves = [t.get('max_move', 0) for t in trend_list]
-        
-        sorted_moves = sorted(moves)
-        p75_idx = int(len(sorted_moves) * 0.75)
-        
-        return {
-            'count': len(trend_list),
-            'avg_duration': sum(durations) / len(durations),
-            'avg_move': sum(moves) / len(moves),
-            'max_move': max(moves) if moves else 0,
-            'p75_move': sorted_moves[p75_idx] if sorted_moves else 0  # 75 percentile
-        }
-
-    # 時間單位 (分鐘)
-    unit_min = {'1m': 1, '5m': 5, '15m': 15, '30m': 30, '1h': 60}.get(interval, 1)
+    is_long = types == LONG
+    unit_min = INTERVAL_MINUTES.get(interval, 1)
     
-    long_stats = calc_stats(longs)
-    short_stats = calc_stats(shorts)
+    long_stats = calc_stats(durations[is_long], moves[is_long])
+    short_stats = calc_stats(durations[~is_long], moves[~is_long])
     
     if verbose:
         print(f"\n📊 {interval} 時間框架趨勢分析")
@@ -128,32 +158,22 @@ def analyze_trend_stats(interval: str, limit: int = 500, verbose: bool = True):
         'volatility': (long_stats['avg_move'] + short_stats['avg_move']) / 2
     }
 
-def get_current_market_state():
-    """獲取當前市場狀態"""
-    # 獲取最近6小時數據 (72個5分鐘K線)
-    klines = get_json(f"{TESTNET_BASE_URL}/fapi/v1/klines", {"symbol": SYMBOL, "interval": "5m", "limit": 72})
+def get_current_market_state(klines):
+    """根據最近6小時數據 (72個5分鐘K線) 計算當前市場狀態"""
     if not klines:
         return None
     
-    closes = [float(k[4]) for k in klines]
-    current_price = closes[-1]
+    closes = klines_to_arrays(klines)[3]
+    current_price = float(closes[-1])
     
     # RSI 計算
-    gains, losses = [], []
-    for i in range(1, len(closes)):
-        diff = closes[i] - closes[i-1]
-        gains.append(diff if diff > 0 else 0)
-        losses.append(abs(diff) if diff < 0 else 0)
-    
-    avg_gain = sum(gains[-14:]) / 14
-    avg_loss = sum(losses[-14:]) / 14
-    rsi = 100 if avg_loss == 0 else 100 - (100 / (1 + avg_gain / avg_loss))
+    rsi = float(calculate_rsi(closes, 14))
     
     # 6小時變化
-    change_6h = (closes[-1] - closes[0]) / closes[0] * 100
+    change_6h = float((closes[-1] - closes[0]) / closes[0] * 100)
     
     # 1小時變化
-    change_1h = (closes[-1] - closes[-12]) / closes[-12] * 100
+    change_1h = float((closes[-1] - closes[-12]) / closes[-12] * 100)
     
     return {
         'price': current_price,
@@ -262,21 +282,25 @@ def save_dynamic_config(params, market_state):
         }
     }
     
-    with open(config_path, 'w') as f:
-        json.dump(config, f, indent=2, ensure_ascii=False)
+    with open(config_path, 'wb') as f:
+        f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
     
     return config_path
 
-def main():
+async def main():
     print("=" * 70)
     print("📊 市場結構分析 + 動態交易參數建議")
     print("=" * 70)
     
+    # 同時發出所有請求，總耗時約為單次 RTT
+    async with httpx.AsyncClient(http2=True, timeout=10) as client:
+        klines_1m, klines_5m, klines_30m, klines_state = await fetch_all(client)
+    
     # 分析不同時間框架
     print("\n🔍 分析趨勢週期...")
-    stats_1m = analyze_trend_stats("1m", 1000)
-    stats_5m = analyze_trend_stats("5m", 500)
-    stats_30m = analyze_trend_stats("30m", 200)
+    stats_1m = analyze_trend_stats("1m", klines_1m)
+    stats_5m = analyze_trend_stats("5m", klines_5m)
+    stats_30m = analyze_trend_stats("30m", klines_30m)
     
     if not stats_1m or not stats_5m:
         print("❌ 無法獲取市場數據")
@@ -291,7 +315,7 @@ def main():
     
     # 獲取當前市場狀態
     print("\n🎯 當前市場狀態...")
-    market_state = get_current_market_state()
+    market_state = get_current_market_state(klines_state)
     if market_state:
         print(f"   價格: ${market_state['price']:,.2f}")
         print(f"   RSI: {market_state['rsi']:.1f}")
@@ -362,4 +386,4 @@ def main():
     print("\n" + "=" * 70)
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
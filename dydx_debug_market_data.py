@@ -7,6 +7,7 @@
 import asyncio
 import sys
 import os
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
@@ -19,8 +20,38 @@ except ImportError:
     print("⚠️  無法導入 dYdX 模組，請確保已安裝 dydx-v4-client 並位於正確目錄")
     sys.exit(1)
 
+from indicators import calculate_rsi
+
 MARGIN_SYMBOL = "BTC-USD"
 
+def get_candle_stats(candles):
+    """K 線回應 -> 價格變化 / RSI 14 / 收盤價序列"""
+    if not candles or not candles.get("candles"):
+        return None
+    
+    # Candles come new to old usually? dYdX specific check needed. 
+    # Standard dYdX response is usually reverse chronological, index 0 is latest.
+    # But let's verify by checking timestamps if implementing strictly.
+    # Assuming index 0 is NEWEST.
+    data = candles["candles"]
+    
+    # Sort by time ascending
+    data.sort(key=lambda x: x['startedAt'])
+    
+    closes = np.fromiter((float(c['close']) for c in data), dtype=np.float64, count=len(data))
+    
+    # Price Change
+    change = float((closes[-1] - closes[0]) / closes[0] * 100)
+    
+    # RSI 14 (資料不足時為 50)
+    rsi = float(calculate_rsi(closes, 14))
+        
+    return {
+        'change': change,
+        'rsi': rsi,
+        'closes': closes
+    }
+
 async def analyze_dydx_market():
     print("==================================================")
     print(f"📈 dYdX 市場結構分析 ({MARGIN_SYMBOL})")
@@ -29,9 +60,16 @@ async def analyze_dydx_market():
     trader = DydxTrader()
     await trader.connect()
     
-    # 1. 獲取基本價格與市場數據
+    # 1. 同時獲取市場數據、訂單簿與 K 線 (1MIN, 5MIN, 30MIN)
+    # dYdX resolutions: 1MIN, 5MIN, 15MIN, 30MIN, 1HOUR, 4HOURS
     print("\n🔍 獲取即時數據...")
-    market = await trader.get_market(MARGIN_SYMBOL)
+    market, orderbook, candles_1m, candles_5m, candles_30m = await asyncio.gather(
+        trader.get_market(MARGIN_SYMBOL),
+        trader.get_orderbook(MARGIN_SYMBOL),
+        trader.get_candles(MARGIN_SYMBOL, resolution="1MIN", limit=60),    # 1小時
+        trader.get_candles(MARGIN_SYMBOL, resolution="5MINS", limit=72),   # 6小時
+        trader.get_candles(MARGIN_SYMBOL, resolution="30MINS", limit=48),  # 24小時
+    )
     if not market:
         print("❌ 無法獲取市場數據")
         return
@@ -42,71 +80,24 @@ async def analyze_dydx_market():
     funding = float(market.get('nextFundingRate', 0)) * 100
     oi = float(market.get('openInterest', 0))
     
-    # 2. 獲取訂單簿計算 OBI
+    # 2. 訂單簿計算 OBI
     obi = 0
-    orderbook = await trader.get_orderbook(MARGIN_SYMBOL)
     if orderbook:
         bids = orderbook.get("bids", [])
         asks = orderbook.get("asks", [])
         
         # 只取前 20 檔或更深
-        bid_vol = sum(float(b['size']) for b in bids)
-        ask_vol = sum(float(a['size']) for a in asks)
+        bid_vol = np.fromiter((b['size'] for b in bids), dtype=np.float64, count=len(bids)).sum()
+        ask_vol = np.fromiter((a['size'] for a in asks), dtype=np.float64, count=len(asks)).sum()
         
         if (bid_vol + ask_vol) > 0:
-            obi = (bid_vol - ask_vol) / (bid_vol + ask_vol)
+            obi = float((bid_vol - ask_vol) / (bid_vol + ask_vol))
 
-    # 3. 獲取 K 線 (1MIN, 5MIN, 30MIN)
-    # dYdX resolutions: 1MIN, 5MIN, 15MIN, 30MIN, 1HOUR, 4HOURS
+    # 3. K 線趨勢結構
     print("\n📊 分析趨勢結構...")
-    
-    async def get_stats(res, limit=100):
-        candles = await trader.get_candles(MARGIN_SYMBOL, resolution=res, limit=limit)
-        if not candles or not candles.get("candles"):
-            return None
-        
-        # Candles come new to old usually? dYdX specific check needed. 
-        # Standard dYdX response is usually reverse chronological, index 0 is latest.
-        # But let's verify by checking timestamps if implementing strictly.
-        # Assuming index 0 is NEWEST.
-        data = candles["candles"]
-        
-        # Sort by time ascending
-        data.sort(key=lambda x: x['startedAt'])
-        
-        closes = [float(c['close']) for c in data]
-        
-        # Price Change
-        change = (closes[-1] - closes[0]) / closes[0] * 100
-        
-        # RSI 14
-        if len(closes) > 14:
-            gains = []
-            losses = []
-            for i in range(1, len(closes)):
-                diff = closes[i] - closes[i-1]
-                gains.append(max(diff, 0))
-                losses.append(abs(min(diff, 0)))
-            
-            avg_gain = sum(gains[-14:]) / 14
-            avg_loss = sum(losses[-14:]) / 14
-            if avg_loss == 0:
-                rsi = 100
-            else:
-                rs = avg_gain / avg_loss
-                rsi = 100 - (100 / (1 + rs))
-        else:
-            rsi = 50
-            
-        return {
-            'change': change,
-            'rsi': rsi,
-            'closes': closes
-        }
-
-    stats_1m = await get_stats("1MIN", 60)   # 1小時
-    stats_5m = await get_stats("5MINS", 72)   # 6小時
-    stats_30m = await get_stats("30MINS", 48) # 24小時
+    stats_1m = get_candle_stats(candles_1m)
+    stats_5m = get_candle_stats(candles_5m)
+    stats_30m = get_candle_stats(candles_30m)
     
     # 4. 報告
     print(f"\n📊 DATA SNAPSHOT:")
@@ -1,15 +1,25 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import statistics
+import numpy as np
 from datetime import datetime
 
+from klines import klines_to_arrays
+
 # Configuration
 TESTNET_BASE_URL = "https://testnet.binancefuture.com"
 SYMBOL = "BTCUSDT"
 
+# Shared keep-alive session: reuse the TCP/TLS connection across requests
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=Retry(total=2, backoff_factor=0.2)))
+SESSION.headers["Accept-Encoding"] = "gzip"
+
 def get_json(url, params=None):
     try:
-        resp = requests.get(url, params=params, timeout=10)
+        resp = SESSION.get(url, params=params, timeout=10)
         if resp.status_code == 200:
             return resp.json()
     except Exception as e:
@@ -21,17 +31,12 @@ def calculate_atr(klines, period=14):
     # TR = Max(H-L, |H-Cp|, |L-Cp|)
     if len(klines) < period + 1: return 0
     
-    trs = []
-    for i in range(1, len(klines)):
-        high = float(klines[i][2])
-        low = float(klines[i][3])
-        prev_close = float(klines[i-1][4])
-        
-        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
-        trs.append(tr)
+    _, high, low, close = klines_to_arrays(klines)
+    prev_close = close[:-1]
+    tr = np.maximum.reduce([high[1:] - low[1:], np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)])
         
     # Simple average for this demo (Wilder's smoothing is standard but SMA is close enough for checking magnitude)
-    return sum(trs[-period:]) / period
+    return float(tr[-period:].mean())
 
 def get_advanced_metrics():
     print(f"\n🔍 Fetching Advanced Metrics for {SYMBOL}...")
@@ -0,0 +1,127 @@
+"""
+📐 共用技術指標 (Numba 編譯)
+輸入皆為 np.float64 陣列，供 Binance / dYdX 分析腳本共用
+"""
+
+import numpy as np
+from numba import njit
+
+# 趨勢類型代碼
+LONG = 1
+SHORT = 0
+
+@njit(cache=True, fastmath=True)
+def calculate_rsi(closes, period):
+    """Wilder 平滑 RSI，單次前向掃描，回傳最後一根的 RSI (資料不足時回傳 50)"""
+    n = len(closes)
+    if n <= period:
+        return 50.0
+
+    # 前 period 個變化量的平均作為種子
+    ag = 0.0
+    al = 0.0
+    for i in range(1, period + 1):
+        diff = closes[i] - closes[i - 1]
+        if diff > 0:
+            ag += diff
+        else:
+            al -= diff
+    ag /= period
+    al /= period
+
+    # Wilder 平滑
+    for i in range(period + 1, n):
+        diff = closes[i] - closes[i - 1]
+        g = diff if diff > 0 else 0.0
+        l = -diff if diff < 0 else 0.0
+        ag = (ag * (period - 1) + g) / period
+        al = (al * (period - 1) + l) / period
+
+    if al == 0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + ag / al)
+
+@njit(cache=True)
+def segment_trends(closes, ema, ema_start):
+    """
+    依收盤價與 EMA 的相對位置切分趨勢段，回傳 (起點, 終點, 類型, 最大幅度)
+    ema[j] 對應 closes[ema_start + j]，從 EMA 種子的下一根開始判斷
+    """
+    n = len(closes)
+    # AOT 版本沒有邊界檢查：ema 必須剛好涵蓋 closes[ema_start:]
+    if len(ema) != n - ema_start or ema_start < 0 or n - ema_start < 2:
+        raise ValueError("segment_trends: ema must cover closes[ema_start:] (len(ema) == len(closes) - ema_start)")
+    first = ema_start + 1
+    # 從 first 開始每根最多一段
+    max_segments = n - first
+    start_idx = np.empty(max_segments, dtype=np.int32)
+    end_idx = np.empty(max_segments, dtype=np.int32)
+    type_code = np.empty(max_segments, dtype=np.int8)
+    max_move = np.empty(max_segments, dtype=np.float64)
+    count = 0
+
+    cur_type = LONG if closes[first] > ema[1] else SHORT
+    cur_start = first
+    cur_hi = closes[first]
+    cur_lo = closes[first]
+
+    # i == n 時寫入最後一段
+    for i in range(first + 1, n + 1):
+        trend_type = cur_type
+        if i < n:
+            trend_type = LONG if closes[i] > ema[i - ema_start] else SHORT
+
+        if i < n and trend_type == cur_type:
+            cur_hi = max(cur_hi, closes[i])
+            cur_lo = min(cur_lo, closes[i])
+            continue
+
+        start_price = closes[cur_start]
+        start_idx[count] = cur_start
+        end_idx[count] = i - 1
+        type_code[count] = cur_type
+        if cur_type == LONG:
+            max_move[count] = (cur_hi - start_price) / start_price * 100
+        else:
+            max_move[count] = (start_price - cur_lo) / start_price * 100
+        count += 1
+
+        if i < n:
+            cur_type = trend_type
+            cur_start = i
+            cur_hi = closes[i]
+            cur_lo = closes[i]
+
+    return start_idx[:count], end_idx[:count], type_code[:count], max_move[:count]
+
+# JIT 版本，build_kernels.py 以此作為 AOT 編譯來源
+JIT_KERNELS = {'calculate_rsi': calculate_rsi, 'segment_trends': segment_trends}
+
+# 核心名稱 -> AOT 匯出簽名 (放在本檔，簽名變更同樣會讓舊的編譯結果失效)
+AOT_SIGNATURES = {
+    'calculate_rsi': 'f8(f8[:], i8)',
+    'segment_trends': 'Tuple((i4[:], i4[:], i1[:], f8[:]))(f8[:], f8[:], i8)',
+}
+
+def kernel_source_hash():
+    """indicators.py 內容的雜湊 (63 bit)，用來確認 market_kernels 是否由目前的原始碼編譯"""
+    # 只在找到 market_kernels 時才需要，延後匯入
+    import hashlib
+    from pathlib import Path
+    digest = hashlib.sha256(Path(__file__).read_bytes()).digest()
+    return int.from_bytes(digest[:8], 'little') >> 1
+
+# 若已執行 build_kernels.py 產生 market_kernels 擴充模組，且與目前原始碼一致，改用預編譯版本以省去每次啟動的 JIT 編譯
+try:
+    import market_kernels
+except ImportError:
+    market_kernels = None
+
+if market_kernels is not None:
+    # 雜湊只在擴充模組存在時計算，未編譯 AOT 的一般執行不需讀取原始碼
+    built_hash = market_kernels.source_hash() if hasattr(market_kernels, 'source_hash') else None
+    if built_hash is not None and built_hash == kernel_source_hash():
+        calculate_rsi = market_kernels.calculate_rsi
+        segment_trends = market_kernels.segment_trends
+    else:
+        print("⚠️ market_kernels 與目前的 indicators.py 不符，改用 JIT 版本 (請重新執行 build_kernels.py)")
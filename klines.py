@@ -0,0 +1,11 @@
+"""
+🕯️ K 線資料轉換 (只依賴 NumPy)
+供 Binance 分析腳本共用，不引入網路 / Numba 等較重的依賴
+"""
+
+import numpy as np
+
+def klines_to_arrays(klines):
+    """將 K 線 [time, open, high, low, close, ...] 一次轉為連續的 float64 陣列 (open, high, low, close)"""
+    ohlc = np.asarray(klines, dtype=object)[:, 1:5].astype(np.float64).T.copy()
+    return ohlc[0], ohlc[1], ohlc[2], ohlc[3]
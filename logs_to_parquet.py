@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+One-off migration: convert whale paper-trader JSON trade logs to Parquet.
+The JSON originals are left in place; predict_profit reads the Parquet copy while it is up to date.
+"""
+
+import glob
+import json
+import os
+import pandas as pd
+
+from predict_profit import LOG_DIR, fresh_parquet_copy
+
+def convert_log(json_path):
+    if fresh_parquet_copy(json_path):
+        return None # Already up to date
+    parquet_path = os.path.splitext(json_path)[0] + ".parquet"
+    
+    with open(json_path, 'r') as file:
+        trades = json.load(file).get('trades', [])
+    if not trades:
+        return None
+    
+    df = pd.DataFrame(trades)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+    df.to_parquet(parquet_path, index=False)
+    return parquet_path
+
+def main():
+    files = sorted(glob.glob(os.path.join(LOG_DIR, "trades_*.json")))
+    converted = 0
+    for f in files:
+        try:
+            out = convert_log(f)
+        except Exception as e:
+            print(f"⚠️ Failed to convert {f}: {e}")
+            continue
+        if out:
+            converted += 1
+            print(f"   {f} -> {out}")
+    
+    print(f"✅ Converted {converted}/{len(files)} trade logs to Parquet")
+
+if __name__ == "__main__":
+    main()
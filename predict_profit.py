@@ -1,47 +1,86 @@
-import json
 import glob
+import math
 import os
-import pandas as pd
+import numpy as np
+import orjson
 from datetime import datetime
 
 LOG_DIR = "logs/whale_paper_trader"
+# Only columns the projection needs (Parquet reads just these)
+TRADE_COLUMNS = ['timestamp', 'hold_seconds', 'pnl_pct']
+TRADE_DTYPE = np.dtype([('timestamp', 'datetime64[ns]'), ('hold_seconds', 'f8'), ('pnl_pct', 'f8')])
+
+def fresh_parquet_copy(json_path):
+    # Parquet copy of a JSON log (see logs_to_parquet.py), only if it isn't older than the JSON
+    parquet_path = os.path.splitext(json_path)[0] + ".parquet"
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(json_path):
+        return parquet_path
+    return None
+
+def find_trade_logs(limit=10):
+    # Newest logs first, ranked by the JSON original's age (the writer still appends to JSON);
+    # read from its Parquet copy only while that copy is up to date
+    logs = []
+    for json_path in glob.glob(os.path.join(LOG_DIR, "trades_*.json")):
+        logs.append((os.path.getmtime(json_path), fresh_parquet_copy(json_path) or json_path))
+    for parquet_path in glob.glob(os.path.join(LOG_DIR, "trades_*.parquet")):
+        if not os.path.exists(os.path.splitext(parquet_path)[0] + ".json"):
+            logs.append((os.path.getmtime(parquet_path), parquet_path))
+    logs.sort(reverse=True)
+    return [path for _, path in logs[:limit]]
+
+def load_trades(path):
+    # -> structured array of TRADE_DTYPE (ISO 8601 timestamps parsed by NumPy)
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq # Deferred: only needed once logs are migrated
+        table = pq.read_table(path, columns=TRADE_COLUMNS)
+        trades = np.empty(table.num_rows, dtype=TRADE_DTYPE)
+        for name in TRADE_COLUMNS:
+            trades[name] = table.column(name).to_numpy()
+        return trades
+    
+    with open(path, 'rb') as file:
+        data = orjson.loads(file.read())
+    rows = data.get('trades', [])
+    # Missing fields become NaT / NaN, same as the Parquet path
+    return np.fromiter(((t.get('timestamp'), t.get('hold_seconds', np.nan), t.get('pnl_pct', np.nan)) for t in rows), dtype=TRADE_DTYPE, count=len(rows))
 
 def predict_profit():
     # 1. Load Data to calculate Frequency
-    files = glob.glob(os.path.join(LOG_DIR, "trades_*.json"))
-    files.sort(key=os.path.getmtime, reverse=True)
-    recent_files = files[:10]
-    
-    all_trades = []
-    for f in recent_files:
+    frames = []
+    for f in find_trade_logs():
         try:
-            with open(f, 'r') as file:
-                data = json.load(file)
-                trades = data.get('trades', [])
-                all_trades.extend(trades)
+            trades = load_trades(f)
+            if len(trades):
+                frames.append(trades)
         except: pass
         
-    if not all_trades: return
+    if not frames: return
 
-    df = pd.DataFrame(all_trades)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    trades = np.concatenate(frames)
     
     # Calculate Total Hours Analyzed (Range of timestamps)
-    total_hours = (df['timestamp'].max() - df['timestamp'].min()).total_seconds() / 3600
+    ts = trades['timestamp']
+    ts = ts[~np.isnat(ts)] # Skip missing timestamps, as pandas did
+    total_hours = (ts.max() - ts.min()) / np.timedelta64(1, 'h') if len(ts) else 0
     if total_hours < 0.1: total_hours = 1 # Avoid div by zero for single burst
     
     print(f"📊 DATA BASIS")
     print(f"   Analyzed History: {total_hours:.1f} hours")
-    print(f"   Total Trades:     {len(df)}")
+    print(f"   Total Trades:     {len(trades)}")
+    
+    hold = trades['hold_seconds']
+    pnl = trades['pnl_pct']
+    swing_mask = hold > 60
     
     # --- SCENARIO 1: Binance Optimized (Swing > 1m) ---
     # Filter: Hold > 60s
-    swing_trades = df[df['hold_seconds'] > 60]
-    swing_count = len(swing_trades)
+    swing_count = int(swing_mask.sum())
     swing_freq = swing_count / total_hours
     
     # Avg Gross PnL for Swings
-    swing_gross_avg = swing_trades['pnl_pct'].mean() if not swing_trades.empty else 0
+    # nanmean: trades with a missing PnL still count, but are skipped in the average (as pandas did)
+    swing_gross_avg = np.nanmean(pnl[swing_mask]) if swing_count else 0
     
     # Binance Fees (50x)
     # Fee Rate: 0.04% (Taker) or 0.02% (Maker). Let's assume mix 0.03%
@@ -58,12 +97,12 @@ def predict_profit():
     # --- SCENARIO 2: dYdX Zero Fee (Scalping < 1m) ---
     # Filter: All trades (since high freq includes scalps) or just Scalps < 60s
     # The user would likely run the scalping strategy
-    scalp_trades = df[df['hold_seconds'] <= 60]
-    scalp_count = len(scalp_trades)
+    scalp_mask = hold <= 60
+    scalp_count = int(scalp_mask.sum())
     scalp_freq = scalp_count / total_hours
     
     # Avg Gross PnL for Scalps (This is Net on dYdX)
-    scalp_gross_avg = scalp_trades['pnl_pct'].mean() if not scalp_trades.empty else 0
+    scalp_gross_avg = np.nanmean(pnl[scalp_mask]) if scalp_count else 0
     dydx_fee_cost = 0.0
     
     scalp_net_avg = scalp_gross_avg - dydx_fee_cost
@@ -99,7 +138,12 @@ def predict_profit():
     print(f"   Avg Net PnL:    +{scalp_net_avg:.2f}%")
     
     # Compound interest might be huge here, but keeping simple for comparison
-    d_final_capital_compound = 100 * ((1 + scalp_net_avg/100) ** int(d_trades_8h))
+    # Work in log space and cap at $1e12 so large trade counts can't overflow
+    if scalp_net_avg <= -100:
+        d_final_capital_compound = 0.0
+    else:
+        log_growth = math.log1p(scalp_net_avg/100) * int(d_trades_8h)
+        d_final_capital_compound = 100 * math.exp(min(log_growth, math.log(1e12 / 100)))
     
     print(f"   💰 Est Profit:   +${(d_final_capital - 100):.2f} (Simple)")
     if d_final_capital_compound < 10000: # Sanity check output